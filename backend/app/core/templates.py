@@ -0,0 +1,22 @@
+# backend/app/core/templates.py
+import os
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache
+from app.utils.http_cache import static_url
+
+TEMPLATE_DIR = "app/templates"
+
+# Compiled template bytecode survives worker restarts (defaults to the system temp dir)
+bytecode_cache = FileSystemBytecodeCache(os.getenv("TEMPLATE_CACHE_DIR") or None)
+
+env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=True,
+    bytecode_cache=bytecode_cache,
+    # On by default like Jinja; set TEMPLATE_AUTO_RELOAD=false in production to skip mtime checks
+    auto_reload=os.getenv("TEMPLATE_AUTO_RELOAD", "true").lower() == "true",
+)
+env.globals["static_url"] = static_url
+
+# Shared by every router so templates are compiled once per process
+templates = Jinja2Templates(env=env)
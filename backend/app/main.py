@@ -1,24 +1,64 @@
+import os
+import asyncio
+from datetime import datetime
+from sqlalchemy import update
 from fastapi import FastAPI
 from app.routes import generate, web_ui, admin
 from app.routes.auth import auth
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
 from app.database import Base, engine, DATABASE_URL
 from app.models import user_model
+from app.utils.log_archive import compact_logs
+from app.utils.http_cache import CachedStaticFiles, etag_middleware
 
 
 print("✅ Connected to database:", DATABASE_URL)
 
 Base.metadata.create_all(bind=engine)
 
+# create_all skips indexes on tables that already exist
+for index in user_model.User.__table__.indexes:
+    index.create(bind=engine, checkfirst=True)
+
+# Keyset pagination needs created_at on every row; date unknown rows as the epoch
+with engine.begin() as conn:
+    conn.execute(
+        update(user_model.User.__table__)
+        .where(user_model.User.created_at.is_(None))
+        .values(created_at=datetime(1970, 1, 1))
+    )
+
 app = FastAPI(title="Text Assistant for freelancers")
 
+# ETag is computed on the uncompressed body, then gzip runs on the way out
+app.middleware("http")(etag_middleware)
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
 
 app.include_router(auth.router, prefix="/api", tags=["Auth"])
 app.include_router(generate.router, prefix="/api", tags=["Generate"])
 app.include_router(web_ui.router, tags=["Web UI"])
 app.include_router(admin.router, tags=["Admin"])
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.mount("/static", CachedStaticFiles(directory="app/static"), name="static")
+
+# Hours between in-process log compaction runs. Off by default so multiple
+# workers don't each start a loop: set it on a single process, or run
+# `python -m app.utils.log_archive` from cron instead.
+LOG_COMPACTION_INTERVAL_HOURS = float(os.getenv("LOG_COMPACTION_INTERVAL_HOURS", "0"))
+
+async def compact_logs_periodically():
+    while True:
+        await asyncio.sleep(LOG_COMPACTION_INTERVAL_HOURS * 3600)
+        try:
+            print("🗜️ Log compaction:", await asyncio.to_thread(compact_logs))
+        except Exception as e:
+            print("❌ Log compaction failed:", e)
+
+@app.on_event("startup")
+async def start_log_compaction():
+    if LOG_COMPACTION_INTERVAL_HOURS > 0:
+        app.state.log_compaction_task = asyncio.create_task(compact_logs_periodically())
 
 @app.get("/")
 def root():
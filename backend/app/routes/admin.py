@@ -53,24 +53,35 @@
 
 
 # backend/app/routes/admin.py
-import os, json
-from datetime import date
-from fastapi import APIRouter, Request, Form, Depends, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
+import os, csv, io
+from urllib.parse import urlencode
+from datetime import date, datetime
+from typing import Optional, Literal
+from fastapi import APIRouter, Request, Form, Depends, HTTPException, UploadFile, File
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, func
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.core.templates import templates
+from app.database import get_db, SessionLocal
 from app.models.user_model import User
-from app.utils.rate_limiter import load_limits, save_limits
+from app.utils.rate_limiter import load_limits, remove_users, reset_users, set_user_limits, DAILY_LIMIT
+from app.utils.logger import load_logs
+from app.utils.log_archive import compact_logs, usage_report, purge_users, list_segments, read_segment
+from app.utils.preflight import preflight_stats
 from dotenv import load_dotenv
 
 load_dotenv()
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 ADMIN_USERNAME = os.getenv("ADMIN_USERNAME")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
 
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+BATCH_SIZE = 500  # keeps IN (...) lists under SQLite's bound-parameter limit
+
 # --------------------------- LOGIN / AUTH ---------------------------
 
 @router.get("/admin", response_class=HTMLResponse)
@@ -96,20 +107,73 @@ def admin_required(request: Request):
     if request.cookies.get("admin_logged_in") != "true":
         raise HTTPException(status_code=403, detail="Admin access required")
 
+# --------------------------- USER QUERIES ---------------------------
+
+def filter_users(query, username_prefix=None, created_after=None, created_before=None):
+    if username_prefix:
+        query = query.filter(User.username.startswith(username_prefix, autoescape=True))
+    if created_after:
+        query = query.filter(User.created_at >= created_after)
+    if created_before:
+        query = query.filter(User.created_at < created_before)
+    return query
+
+
+def encode_cursor(created_at: datetime, user_id: int) -> str:
+    return f"{created_at.isoformat()}|{user_id}"
+
+
+def decode_cursor(cursor: str):
+    try:
+        created_at, user_id = cursor.split("|")
+        return datetime.fromisoformat(created_at), int(user_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def page_users(db: Session, cursor: str | None = None, limit: int = PAGE_SIZE, **filters):
+    """
+    Keyset pagination over users, newest first, using the created_at index.
+    Returns (users, next_cursor). Rows without created_at are backfilled at
+    startup; any left over are skipped since they cannot be keyset-compared.
+    """
+    query = filter_users(db.query(User.id, User.username, User.created_at), **filters)
+    query = query.filter(User.created_at.isnot(None))
+    if cursor:
+        created_at, user_id = decode_cursor(cursor)
+        query = query.filter(
+            or_(User.created_at < created_at, and_(User.created_at == created_at, User.id < user_id))
+        )
+
+    rows = query.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_cursor(rows[limit - 1].created_at, rows[limit - 1].id) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def batches(items, size=BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
 # --------------------------- DASHBOARD ---------------------------
 
 @router.get("/admin/dashboard", response_class=HTMLResponse)
-async def admin_dashboard(request: Request, db: Session = Depends(get_db)):
+async def admin_dashboard(
+    request: Request,
+    cursor: Optional[str] = None,
+    q: Optional[str] = None,
+    message: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
     """Main admin control panel with usage + user stats."""
     admin_required(request)
 
-    users = db.query(User).all()
+    users, next_cursor = page_users(db, cursor=cursor, username_prefix=q)
     usage_data = load_limits()
 
     # Summary stats
-    total_users = len(users)
+    total_users = db.query(func.count(User.id)).scalar()
     total_generations = sum(u["count"] for u in usage_data.values()) if usage_data else 0
-    active_today = len([u for u in usage_data.values() if u["date"] == str(date.today())])
+    active_today = len([u for u in usage_data.values() if u["date"] == str(date.today()) and u["count"] > 0])
 
     summary = {
         "total_users": total_users,
@@ -119,7 +183,18 @@ async def admin_dashboard(request: Request, db: Session = Depends(get_db)):
 
     return templates.TemplateResponse(
         "admin_dashboard.html",
-        {"request": request, "users": users, "usage": usage_data, "summary": summary},
+        {
+            "request": request,
+            "users": users,
+            "next_cursor": next_cursor,
+            "q": q,
+            # Most recently active first, capped like the user table
+            "usage": sorted(usage_data.items(), key=lambda kv: (kv[1]["date"], kv[1]["count"]), reverse=True)[:PAGE_SIZE],
+            "usage_total": len(usage_data),
+            "default_limit": DAILY_LIMIT,
+            "message": message,
+            "summary": summary,
+        },
     )
 
 # --------------------------- ACTIONS ---------------------------
@@ -134,12 +209,9 @@ async def reset_all_usage(request: Request):
 
 @router.post("/admin/reset-user")
 async def reset_user_limit(request: Request, username: str = Form(...)):
-    """Reset a single user's usage count."""
+    """Reset a single user's usage count (keeping any custom quota)."""
     admin_required(request)
-    data = load_limits()
-    if username in data:
-        del data[username]
-        save_limits(data)
+    reset_users([username])
     return RedirectResponse("/admin/dashboard", status_code=302)
 
 
@@ -147,23 +219,197 @@ async def reset_user_limit(request: Request, username: str = Form(...)):
 async def delete_user(
     request: Request, username: str = Form(...), db: Session = Depends(get_db)
 ):
-    """Delete a user account."""
+    """Delete a user account along with its usage and log data."""
     admin_required(request)
     db.query(User).filter(User.username == username).delete()
     db.commit()
+    remove_users([username])
+    await run_in_threadpool(purge_users, [username])
     return RedirectResponse("/admin/dashboard", status_code=302)
 
 
+# --------------------------- USER MANAGEMENT API ---------------------------
+
+class UserSelection(BaseModel):
+    usernames: Optional[list[str]] = None
+    username_prefix: Optional[str] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
+class BulkUserAction(UserSelection):
+    action: Literal["delete", "reset", "quota"]
+    daily_limit: Optional[int] = None  # for "quota"; null restores the default limit
+
+
+def select_usernames(db: Session, selection: UserSelection) -> list[str]:
+    filters = {
+        "username_prefix": selection.username_prefix,
+        "created_after": selection.created_after,
+        "created_before": selection.created_before,
+    }
+    if selection.usernames is None and not any(filters.values()):
+        raise HTTPException(status_code=400, detail="Provide usernames or at least one filter.")
+
+    query = filter_users(db.query(User.username), **filters)
+    if selection.usernames is None:
+        return [row.username for row in query]
+
+    usernames = []
+    for batch in batches(list(dict.fromkeys(selection.usernames))):
+        usernames.extend(row.username for row in query.filter(User.username.in_(batch)))
+    return usernames
+
+
+def run_bulk_action(db: Session, bulk: BulkUserAction) -> dict:
+    """Blocking DB/file work; callers run it in the threadpool."""
+    if bulk.action == "quota" and bulk.daily_limit is not None and bulk.daily_limit < 0:
+        raise HTTPException(status_code=400, detail="daily_limit must be 0 or more.")
+
+    usernames = select_usernames(db, bulk)
+    result = {"action": bulk.action, "matched": len(usernames)}
+
+    if bulk.action == "delete":
+        for batch in batches(usernames):
+            db.query(User).filter(User.username.in_(batch)).delete(synchronize_session=False)
+        db.commit()
+        result["usage_entries_removed"] = remove_users(usernames)
+        result["log_entries_removed"] = purge_users(usernames) if usernames else 0
+    elif bulk.action == "reset":
+        result["reset"] = reset_users(usernames)
+    else:
+        result["updated"] = set_user_limits(usernames, bulk.daily_limit)
+
+    return result
+
+
+@router.get("/admin/users")
+async def search_users(
+    request: Request,
+    q: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: int = PAGE_SIZE,
+    db: Session = Depends(get_db),
+):
+    """Search users by username prefix / signup date, one keyset page at a time."""
+    admin_required(request)
+    users, next_cursor = page_users(
+        db,
+        cursor=cursor,
+        limit=max(1, min(limit, MAX_PAGE_SIZE)),
+        username_prefix=q,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    return {
+        "users": [{"id": u.id, "username": u.username, "created_at": u.created_at} for u in users],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/admin/users/export")
+async def export_users(
+    request: Request,
+    q: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+):
+    """Stream every matching user as CSV without loading them all into memory."""
+    admin_required(request)
+
+    def rows():
+        # Own session: the request's get_db session may be closed before streaming ends
+        db = SessionLocal()
+        try:
+            yield "id,username,created_at\r\n"
+            query = filter_users(
+                db.query(User.id, User.username, User.created_at),
+                username_prefix=q,
+                created_after=created_after,
+                created_before=created_before,
+            )
+            for user in query.order_by(User.id).yield_per(1000):
+                buffer = io.StringIO()
+                csv.writer(buffer).writerow([user.id, user.username, user.created_at])
+                yield buffer.getvalue()
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        rows(),
+        media_type="text/csv",
+        headers={"Content-Disposition": "attachment; filename=users.csv"},
+    )
+
+
+@router.post("/admin/users/bulk")
+async def bulk_users(request: Request, bulk: BulkUserAction, db: Session = Depends(get_db)):
+    """Delete, reset or set quotas for many users selected by name list or filters."""
+    admin_required(request)
+    # Scans, batched deletes and archive rewrites can take a while, so keep them off the event loop
+    return await run_in_threadpool(run_bulk_action, db, bulk)
+
+
+@router.post("/admin/users/bulk-csv")
+async def bulk_users_csv(
+    request: Request,
+    action: Literal["delete", "reset", "quota"] = Form(...),
+    daily_limit: Optional[int] = Form(None),
+    file: UploadFile = File(...),
+    db: Session = Depends(get_db),
+):
+    """Dashboard form version of /admin/users/bulk, with usernames from the first CSV column."""
+    admin_required(request)
+    text = (await file.read()).decode("utf-8-sig")
+    usernames = [row[0].strip() for row in csv.reader(io.StringIO(text)) if row and row[0].strip()]
+    if usernames and usernames[0].lower() == "username":
+        usernames = usernames[1:]
+
+    # An empty number field must not silently clear everyone's custom quota
+    if action == "quota" and daily_limit is None:
+        message = "Enter a daily limit to set quotas."
+    else:
+        bulk = BulkUserAction(action=action, daily_limit=daily_limit, usernames=usernames)
+        result = await run_in_threadpool(run_bulk_action, db, bulk)
+        message = "Bulk " + ", ".join(f"{key.replace('_', ' ')}: {value}" for key, value in result.items())
+    return RedirectResponse(f"/admin/dashboard?{urlencode({'message': message})}", status_code=302)
+
+
 @router.get("/admin/logs", response_class=HTMLResponse)
-async def view_logs(request: Request):
-    """View AI generation logs."""
+async def view_logs(request: Request, segment: Optional[str] = None):
+    """View AI generation logs: recent (not yet compacted) ones, or one archived segment."""
     admin_required(request)
-    try:
-        with open("logs.json", "r") as f:
-            logs = json.load(f)
-    except:
-        logs = []
-    return templates.TemplateResponse("admin_logs.html", {"request": request, "logs": logs})
+    logs = read_segment(segment) if segment else load_logs()
+    return templates.TemplateResponse(
+        "admin_logs.html",
+        {"request": request, "logs": logs, "segment": segment, "segments": list_segments()},
+    )
+
+
+# --------------------------- ANALYTICS ---------------------------
+
+@router.post("/admin/compact-logs")
+async def compact_interaction_logs(request: Request):
+    """Move raw interaction logs into a compressed columnar segment."""
+    admin_required(request)
+    # Compresses and writes a segment while holding the logs lock, so keep it off the event loop
+    return await run_in_threadpool(compact_logs)
+
+
+@router.get("/admin/analytics")
+async def analytics(request: Request, start: Optional[date] = None, end: Optional[date] = None):
+    """Tokens per user per day and mode mix from the compacted log archive."""
+    admin_required(request)
+    return await run_in_threadpool(usage_report, start, end)
+
+
+@router.get("/admin/preflight-metrics")
+async def preflight_metrics(request: Request):
+    """How many generate calls were rejected before reaching OpenAI."""
+    admin_required(request)
+    return preflight_stats()
 
 
 @router.post("/admin/logout")
@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException, Request
 from app.models.promp_model import GenerateRequest, GenerateResponse
 from app.utils.logger import log_interaction
 from app.utils.rate_limiter import check_and_increment, remaining_requests
+from app.utils.preflight import preflight
 from openai import OpenAI
 from dotenv import load_dotenv
 from jose import jwt, JWTError
@@ -34,14 +35,17 @@ async def generate_text(request: Request, payload: GenerateRequest):
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired session. Please log in again.")
 
-    # 🚦 Step 3: Check daily request limit
+    # 🧹 Step 3: Normalize and pre-validate input (rejected calls are not charged)
+    payload = preflight(payload)
+
+    # 🚦 Step 4: Check daily request limit
     if not check_and_increment(username):
         raise HTTPException(
             status_code=429,
             detail="Daily free limit reached (0 remaining). Try again tomorrow or upgrade your plan."
         )
 
-    # 🧠 Step 4: Build and send prompt to OpenAI
+    # 🧠 Step 5: Build and send prompt to OpenAI
     try:
         prompt = build_prompt(payload.mode, payload.instruction, payload.user_text)
         completion = client.chat.completions.create(
@@ -53,9 +57,10 @@ async def generate_text(request: Request, payload: GenerateRequest):
         result = completion.choices[0].message.content.strip()
         usage = completion.usage.dict() if hasattr(completion, "usage") else {}
 
-        # 🪵 Step 5: Log interaction
+        # 🪵 Step 6: Log interaction
         log_interaction(
             user_id=username,
+            mode=payload.mode,
             instruction=payload.instruction,
             user_text=payload.user_text,
             ai_response=result,
@@ -1,16 +1,15 @@
 from fastapi import APIRouter, Request, Form, Depends
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from datetime import timedelta
 from app.database import get_db
 from app.models.user_model import User
+from app.core.templates import templates
 from app.core.auth import create_access_token, verify_password, hash_password
 from app.utils.rate_limiter import remaining_requests
 import re   # 🟢 [ADDED] for regex password validation
 
 router = APIRouter()
-templates = Jinja2Templates(directory="app/templates")
 
 
 @router.get("/", response_class=HTMLResponse)
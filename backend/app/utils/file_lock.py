@@ -0,0 +1,23 @@
+# backend/app/utils/file_lock.py
+import fcntl
+import threading
+from contextlib import contextmanager
+
+_thread_locks = {}
+_registry_lock = threading.Lock()
+
+
+@contextmanager
+def file_lock(path: str):
+    """
+    Serializes read-modify-writes of a JSON state file, across threads
+    (per-path thread lock) and gunicorn workers (flock on "<path>.lock").
+    """
+    with _registry_lock:
+        thread_lock = _thread_locks.setdefault(path, threading.Lock())
+    with thread_lock, open(path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
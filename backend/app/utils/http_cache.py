@@ -0,0 +1,71 @@
+# backend/app/utils/http_cache.py
+import hashlib
+import os
+from urllib.parse import parse_qs
+from fastapi import Request
+from fastapi.responses import Response
+from fastapi.staticfiles import StaticFiles
+
+STATIC_DIR = "app/static"
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+_asset_hashes = {}
+
+
+def asset_hash(path: str) -> str:
+    """Short content hash of a static file, recomputed only when it changes."""
+    full_path = os.path.join(STATIC_DIR, path)
+    mtime = os.stat(full_path).st_mtime
+    cached = _asset_hashes.get(path)
+    if not cached or cached[0] != mtime:
+        with open(full_path, "rb") as f:
+            cached = (mtime, hashlib.md5(f.read()).hexdigest()[:12])
+        _asset_hashes[path] = cached
+    return cached[1]
+
+
+def static_url(path: str) -> str:
+    """/static URL with a content hash, so the file can be cached forever."""
+    return f"/static/{path}?v={asset_hash(path)}"
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles with long-lived caching for URLs whose ?v= matches the file's
+    current hash (ETag/304 come from Starlette). Anything else gets no-cache.
+    """
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        version = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("v", [None])[0]
+        if version and version == asset_hash(self.get_path(scope)):
+            response.headers["Cache-Control"] = IMMUTABLE
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+
+async def etag_middleware(request: Request, call_next):
+    """Adds an ETag to GET HTML/JSON responses and answers 304 when it matches."""
+    response = await call_next(request)
+    content_type = response.headers.get("content-type", "")
+    if (
+        request.method != "GET"
+        or response.status_code != 200
+        or not content_type.startswith(("text/html", "application/json"))
+    ):
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = f'W/"{hashlib.md5(body).hexdigest()}"'
+
+    cache_control = response.headers.get("cache-control", "private, no-cache")
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+    cached = Response(content=body, status_code=response.status_code)
+    cached.raw_headers = response.raw_headers
+    cached.headers["ETag"] = etag
+    cached.headers["Cache-Control"] = cache_control
+    return cached
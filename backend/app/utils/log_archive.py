@@ -0,0 +1,260 @@
+# backend/app/utils/log_archive.py
+import glob
+import gzip
+import json
+import os
+from datetime import date, datetime
+
+import numpy as np
+
+from app.utils.logger import load_logs, save_logs, logs_lock
+
+ARCHIVE_DIR = "log_archive"
+TEXT_FIELDS = ("instruction", "user_text", "ai_response")
+NUMERIC_FIELDS = ("timestamp", "user", "mode", "prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def _records_to_columns(records: list) -> dict:
+    """Builds the segment columns (with dictionary-encoded user/mode) from raw log records."""
+    users, user_codes = np.unique([r.get("user_id") or "" for r in records], return_inverse=True)
+    modes, mode_codes = np.unique([r.get("mode") or "unknown" for r in records], return_inverse=True)
+
+    def usage_column(key):
+        return np.array([(r.get("token_usage") or {}).get(key) or 0 for r in records], dtype=np.int32)
+
+    return {
+        "timestamp": np.array([r["timestamp"] for r in records], dtype="datetime64[s]"),
+        "users": users,
+        "user": user_codes.astype(np.int32),
+        "modes": modes,
+        "mode": mode_codes.astype(np.int16),
+        "prompt_tokens": usage_column("prompt_tokens"),
+        "completion_tokens": usage_column("completion_tokens"),
+        "total_tokens": usage_column("total_tokens"),
+    }
+
+
+def _save_segment(path: str, columns: dict):
+    """Writes a segment to a temp file and swaps it in, so readers never see a partial file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, **columns)
+    os.replace(tmp_path, path)
+
+
+def _segment_paths() -> list:
+    return sorted(glob.glob(os.path.join(ARCHIVE_DIR, "segment-*.npz")))
+
+
+def compact_logs() -> dict:
+    """
+    Moves raw interactions from logs.json into a compressed columnar segment.
+
+    Numeric columns (timestamps, token counts) and dictionary-encoded
+    user/mode columns go into a .npz file. The large text columns go into a
+    separate gzip file so analytics never have to read them.
+    """
+    with logs_lock():
+        records = load_logs()
+        if not records:
+            return {"compacted": 0, "segment": None}
+
+        os.makedirs(ARCHIVE_DIR, exist_ok=True)
+        segment = datetime.utcnow().strftime("segment-%Y%m%dT%H%M%S%f")
+
+        # Text first: a segment is only visible to readers once its .npz exists
+        with gzip.open(os.path.join(ARCHIVE_DIR, segment + ".text.jsonl.gz"), "wt", encoding="utf-8") as f:
+            for r in records:
+                f.write(json.dumps({k: r.get(k) for k in TEXT_FIELDS}) + "\n")
+        _save_segment(os.path.join(ARCHIVE_DIR, segment + ".npz"), _records_to_columns(records))
+
+        save_logs([])
+
+    return {"compacted": len(records), "segment": segment}
+
+
+def list_segments() -> list:
+    """Names of archived segments, newest first."""
+    return [os.path.basename(path)[: -len(".npz")] for path in reversed(_segment_paths())]
+
+
+def read_segment(segment: str) -> list:
+    """
+    Rebuilds the log records (same shape as logs.json) of one archived segment.
+    Returns [] for unknown segment names.
+    """
+    if segment not in list_segments():
+        return []
+
+    path = os.path.join(ARCHIVE_DIR, segment)
+    with np.load(path + ".npz") as seg:
+        columns = {name: seg[name] for name in seg.files}
+    try:
+        with gzip.open(path + ".text.jsonl.gz", "rt", encoding="utf-8") as f:
+            texts = [json.loads(line) for line in f]
+    except FileNotFoundError:
+        texts = [{} for _ in columns["timestamp"]]
+
+    return [
+        {
+            "timestamp": str(columns["timestamp"][i]),
+            "user_id": str(columns["users"][columns["user"][i]]),
+            "mode": str(columns["modes"][columns["mode"][i]]),
+            **texts[i],
+            "token_usage": {
+                "prompt_tokens": int(columns["prompt_tokens"][i]),
+                "completion_tokens": int(columns["completion_tokens"][i]),
+                "total_tokens": int(columns["total_tokens"][i]),
+            },
+        }
+        for i in range(len(columns["timestamp"]))
+    ]
+
+
+def _load_columns(start: date | None, end: date | None):
+    """
+    Concatenates the numeric columns of every segment plus the not yet
+    compacted tail of logs.json, filtered by day.
+    """
+    timestamps, users, modes, prompt, completion, total = [], [], [], [], [], []
+
+    sources = _segment_paths()
+    raw = load_logs()
+    if raw:
+        sources.append(_records_to_columns(raw))
+
+    for source in sources:
+        if isinstance(source, dict):
+            seg = source
+        else:
+            with np.load(source) as npz:
+                seg = {name: npz[name] for name in npz.files}
+
+        ts = seg["timestamp"]
+        days = ts.astype("datetime64[D]")
+        mask = np.ones(len(ts), dtype=bool)
+        if start:
+            mask &= days >= np.datetime64(start)
+        if end:
+            mask &= days <= np.datetime64(end)
+        if not mask.any():
+            continue
+
+        timestamps.append(ts[mask])
+        users.append(seg["users"][seg["user"][mask]])
+        modes.append(seg["modes"][seg["mode"][mask]])
+        prompt.append(seg["prompt_tokens"][mask])
+        completion.append(seg["completion_tokens"][mask])
+        total.append(seg["total_tokens"][mask])
+
+    if not timestamps:
+        return None
+
+    return {
+        "timestamp": np.concatenate(timestamps),
+        "user": np.concatenate(users),
+        "mode": np.concatenate(modes),
+        "prompt_tokens": np.concatenate(prompt),
+        "completion_tokens": np.concatenate(completion),
+        "total_tokens": np.concatenate(total),
+    }
+
+
+def usage_report(start: date | None = None, end: date | None = None) -> dict:
+    """Tokens per user per day and mode mix over archived and not yet compacted logs."""
+    cols = _load_columns(start, end)
+    if cols is None:
+        return {
+            "interactions": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "total_tokens": 0,
+            "tokens_per_user_per_day": [],
+            "mode_mix": {},
+        }
+
+    users, user_idx = np.unique(cols["user"], return_inverse=True)
+    days, day_idx = np.unique(cols["timestamp"].astype("datetime64[D]"), return_inverse=True)
+    # Compact the (user, day) keys to the pairs that actually occur, so the
+    # counts never span the full users x days grid
+    groups, group_idx = np.unique(user_idx.astype(np.int64) * len(days) + day_idx, return_inverse=True)
+
+    requests = np.bincount(group_idx, minlength=len(groups))
+    tokens = np.bincount(group_idx, weights=cols["total_tokens"], minlength=len(groups))
+
+    per_user_day = [
+        {
+            "user_id": str(users[g // len(days)]),
+            "date": str(days[g % len(days)]),
+            "requests": int(requests[i]),
+            "total_tokens": int(tokens[i]),
+        }
+        for i, g in enumerate(groups)
+    ]
+
+    modes, mode_counts = np.unique(cols["mode"], return_counts=True)
+
+    return {
+        "interactions": int(len(cols["timestamp"])),
+        "prompt_tokens": int(cols["prompt_tokens"].sum(dtype=np.int64)),
+        "completion_tokens": int(cols["completion_tokens"].sum(dtype=np.int64)),
+        "total_tokens": int(cols["total_tokens"].sum(dtype=np.int64)),
+        "tokens_per_user_per_day": per_user_day,
+        "mode_mix": {str(m): int(c) for m, c in zip(modes, mode_counts)},
+    }
+
+
+def purge_users(usernames) -> int:
+    """Removes every raw and archived interaction belonging to the given users."""
+    usernames = set(usernames)
+    with logs_lock():
+        return _purge_users(usernames)
+
+
+def _purge_users(usernames: set) -> int:
+    removed = 0
+
+    records = load_logs()
+    kept = [r for r in records if r.get("user_id") not in usernames]
+    if len(kept) != len(records):
+        removed += len(records) - len(kept)
+        save_logs(kept)
+
+    for path in _segment_paths():
+        with np.load(path) as seg:
+            columns = {name: seg[name] for name in seg.files}
+
+        purged_codes = np.flatnonzero(np.isin(columns["users"], list(usernames)))
+        drop = np.isin(columns["user"], purged_codes)
+        if not drop.any():
+            continue
+        removed += int(drop.sum())
+
+        text_path = path[: -len(".npz")] + ".text.jsonl.gz"
+        if drop.all():
+            os.remove(path)
+            if os.path.exists(text_path):
+                os.remove(text_path)
+            continue
+
+        keep = ~drop
+        for name in NUMERIC_FIELDS:
+            columns[name] = columns[name][keep]
+        # Re-encode so purged usernames do not linger in the dictionary
+        users, user_codes = np.unique(columns["users"][columns["user"]], return_inverse=True)
+        columns["users"], columns["user"] = users, user_codes.astype(np.int32)
+
+        if os.path.exists(text_path):
+            with gzip.open(text_path, "rt", encoding="utf-8") as f:
+                lines = f.readlines()
+            with gzip.open(text_path + ".tmp", "wt", encoding="utf-8") as f:
+                f.writelines(line for line, k in zip(lines, keep) if k)
+            os.replace(text_path + ".tmp", text_path)
+        _save_segment(path, columns)
+
+    return removed
+
+
+if __name__ == "__main__":
+    # Run from backend/ (e.g. via cron): python -m app.utils.log_archive
+    print(compact_logs())
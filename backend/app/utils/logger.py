@@ -1,37 +1,51 @@
 import json
 import os
 from datetime import datetime
+from app.utils.file_lock import file_lock
 
 LOG_FILE = "logs.json"
 
-def log_interaction(user_id: str, instruction: str, user_text: str, ai_response: str, usage: dict):
+
+def logs_lock():
+    """Serializes every read-modify-write of logs.json (threads and workers)."""
+    return file_lock(LOG_FILE)
+
+
+def load_logs() -> list:
+    """Reads logs.json, treating a missing/empty/corrupted file as no logs."""
+    if not os.path.exists(LOG_FILE):
+        return []
+    try:
+        with open(LOG_FILE, "r") as f:
+            content = f.read().strip()
+            return json.loads(content) if content else []
+    except json.JSONDecodeError:
+        return []  # file corrupted, start fresh
+
+
+def save_logs(data: list):
+    """Writes to a temp file and swaps it in, so readers never see a half-written file."""
+    tmp_file = LOG_FILE + ".tmp"
+    with open(tmp_file, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_file, LOG_FILE)
+
+
+def log_interaction(user_id: str, instruction: str, user_text: str, ai_response: str, usage: dict, mode: str | None = None):
     """Logs every GPT interaction safely to a JSON file."""
 
     log_entry = {
         "timestamp": datetime.utcnow().isoformat(),
         "user_id": user_id,
+        "mode": mode,
         "instruction": instruction,
         "user_text": user_text,
         "ai_response": ai_response,
         "token_usage": usage,
     }
 
-    # Ensure file exists
-    if not os.path.exists(LOG_FILE):
-        with open(LOG_FILE, "w") as f:
-            json.dump([], f)
-
-    # ✅ Safely load or reset if file is empty/corrupted
-    try:
-        with open(LOG_FILE, "r") as f:
-            content = f.read().strip()
-            data = json.loads(content) if content else []
-    except json.JSONDecodeError:
-        data = []  # file corrupted, start fresh
-
-    # Add the new log entry
-    data.append(log_entry)
-
-    # ✅ Write back safely
-    with open(LOG_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    # ✅ Load, append and write back under the shared lock
+    with logs_lock():
+        data = load_logs()
+        data.append(log_entry)
+        save_logs(data)
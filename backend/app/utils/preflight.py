@@ -0,0 +1,127 @@
+# backend/app/utils/preflight.py
+import json
+import os
+import re
+import unicodedata
+from fastapi import HTTPException
+from app.models.promp_model import GenerateRequest
+from app.utils.file_lock import file_lock
+
+# Per-mode token budgets for (instruction, user_text)
+MODE_LIMITS = {
+    "proposal_writer": {"instruction": 200, "user_text": 2000},
+    "message_rewriter": {"instruction": 100, "user_text": 1000},
+    "text_summarizer": {"instruction": 100, "user_text": 4000},
+}
+
+# Hard cap per field, checked on the raw input before any normalization work
+MAX_RAW_CHARS = 32_000
+
+# Roughly how OpenAI tokenizers split text: each CJK/kana/Hangul character,
+# each run of other word characters, and each punctuation mark
+CJK_CHARS = r"\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af"
+TOKEN_PATTERN = re.compile(rf"[{CJK_CHARS}]|[^\W{CJK_CHARS}]+|[^\w\s]")
+
+# Calls rejected locally instead of costing a model round trip, by reason.
+# Kept in a file so the counts cover every worker and survive restarts.
+METRICS_FILE = "preflight_metrics.json"
+
+
+def count_tokens(text: str) -> int:
+    """
+    Cheap local approximation of the model's token count: the word/character
+    count, or ~4 characters per token for long words, whichever is larger.
+    """
+    return max(len(TOKEN_PATTERN.findall(text)), len(text) // 4)
+
+
+def normalize_text(text: str) -> str:
+    """
+    NFC-normalize, drop control chars (except newlines/tabs), strip trailing
+    whitespace and collapse runs of blank lines. Leading indentation and
+    format chars such as ZWJ/ZWNJ are kept.
+    """
+    text = unicodedata.normalize("NFC", text)
+    text = "".join(ch for ch in text if ch in "\n\t" or unicodedata.category(ch) != "Cc")
+    text = re.sub(r"[ \t]+\n", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip("\n").rstrip()
+
+
+def strip_duplicate_paragraphs(text: str) -> str:
+    """Remove paragraphs that were pasted more than once, keeping the first copy."""
+    seen = set()
+    kept = []
+    for paragraph in text.split("\n\n"):
+        key = " ".join(paragraph.lower().split())
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(paragraph)
+    return "\n\n".join(kept)
+
+
+def load_metrics() -> dict:
+    if not os.path.exists(METRICS_FILE):
+        return {"passed": 0, "rejected": {}}
+    with open(METRICS_FILE, "r") as f:
+        try:
+            return json.load(f)
+        except json.JSONDecodeError:
+            return {"passed": 0, "rejected": {}}
+
+
+def record_outcome(reason: str | None = None):
+    """Counts a passed request (reason=None) or a rejection by reason."""
+    with file_lock(METRICS_FILE):
+        metrics = load_metrics()
+        if reason is None:
+            metrics["passed"] += 1
+        else:
+            metrics["rejected"][reason] = metrics["rejected"].get(reason, 0) + 1
+        tmp_file = METRICS_FILE + ".tmp"
+        with open(tmp_file, "w") as f:
+            json.dump(metrics, f, indent=2)
+        os.replace(tmp_file, METRICS_FILE)
+
+
+def reject(reason: str, status_code: int, detail: str):
+    record_outcome(reason)
+    raise HTTPException(status_code=status_code, detail=detail)
+
+
+def preflight(payload: GenerateRequest) -> GenerateRequest:
+    """
+    Validates and cleans a generate request before it is charged or sent upstream.
+    Raises a 4xx HTTPException for requests that should never reach the model.
+    """
+    if len(payload.instruction) > MAX_RAW_CHARS or len(payload.user_text) > MAX_RAW_CHARS:
+        reject("raw_input_too_long", 413, f"Input is too long (max {MAX_RAW_CHARS} characters per field).")
+
+    mode = payload.mode.strip()
+    if mode not in MODE_LIMITS:
+        reject("unknown_mode", 400, f"Unknown mode '{payload.mode}'. Choose one of: {', '.join(MODE_LIMITS)}.")
+
+    instruction = normalize_text(payload.instruction)
+    user_text = strip_duplicate_paragraphs(normalize_text(payload.user_text))
+
+    if not instruction or not user_text:
+        reject("empty_input", 400, "Please fill out both the instruction and your text.")
+
+    limits = MODE_LIMITS[mode]
+    if count_tokens(instruction) > limits["instruction"]:
+        reject("instruction_too_long", 413, f"Instruction is too long (max ~{limits['instruction']} tokens).")
+    if count_tokens(user_text) > limits["user_text"]:
+        reject("text_too_long", 413, f"Text is too long for this task (max ~{limits['user_text']} tokens).")
+
+    record_outcome()
+    return GenerateRequest(mode=mode, instruction=instruction, user_text=user_text)
+
+
+def preflight_stats() -> dict:
+    metrics = load_metrics()
+    return {
+        "passed": metrics["passed"],
+        "upstream_calls_saved": sum(metrics["rejected"].values()),
+        "rejected_by_reason": metrics["rejected"],
+    }
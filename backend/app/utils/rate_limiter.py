@@ -2,6 +2,7 @@
 import json
 import os
 from datetime import date
+from app.utils.file_lock import file_lock
 
 LIMIT_FILE = "usage_limits.json"
 DAILY_LIMIT = 10
@@ -17,8 +18,15 @@ def load_limits():
             return {}
 
 def save_limits(data):
-    with open(LIMIT_FILE, "w") as f:
+    # Swap in a complete file so readers never see a half-written one
+    tmp_file = LIMIT_FILE + ".tmp"
+    with open(tmp_file, "w") as f:
         json.dump(data, f, indent=2)
+    os.replace(tmp_file, LIMIT_FILE)
+
+def limits_lock():
+    """Serializes every read-modify-write of usage_limits.json (threads and workers)."""
+    return file_lock(LIMIT_FILE)
 
 def check_and_increment(username: str) -> bool:
     """
@@ -26,28 +34,88 @@ def check_and_increment(username: str) -> bool:
     Automatically resets daily.
     """
     today = str(date.today())
-    data = load_limits()
+    with limits_lock():
+        data = load_limits()
 
-    if username not in data:
-        data[username] = {"date": today, "count": 0}
+        if username not in data:
+            data[username] = {"date": today, "count": 0}
 
-    # Reset daily count if date changed
-    if data[username]["date"] != today:
-        data[username] = {"date": today, "count": 0}
+        # Reset daily count if date changed (keeping any per-user quota)
+        if data[username]["date"] != today:
+            data[username].update({"date": today, "count": 0})
 
-    if data[username]["count"] >= DAILY_LIMIT:
-        return False
+        if data[username]["count"] >= data[username].get("limit", DAILY_LIMIT):
+            return False
 
-    # Increment usage
-    data[username]["count"] += 1
-    save_limits(data)
+        # Increment usage
+        data[username]["count"] += 1
+        save_limits(data)
     return True
 
 def remaining_requests(username: str) -> int:
     today = str(date.today())
     data = load_limits()
 
-    if username not in data or data[username]["date"] != today:
+    if username not in data:
         return DAILY_LIMIT
 
-    return DAILY_LIMIT - data[username]["count"]
+    limit = data[username].get("limit", DAILY_LIMIT)
+    if data[username]["date"] != today:
+        return limit
+
+    return max(limit - data[username]["count"], 0)
+
+def remove_users(usernames) -> int:
+    """Drops usage entries (and custom quotas) for many users in one write."""
+    with limits_lock():
+        data = load_limits()
+        removed = [u for u in usernames if data.pop(u, None) is not None]
+        if removed:
+            save_limits(data)
+    return len(removed)
+
+# Date for entries that only carry a quota, so they never look "active today"
+NO_USAGE_DATE = ""
+
+def reset_users(usernames) -> int:
+    """Zeroes today's count for many users, keeping their custom quotas."""
+    with limits_lock():
+        data = load_limits()
+        reset = 0
+        for username in usernames:
+            entry = data.get(username)
+            if entry is None:
+                continue
+            if "limit" in entry:
+                data[username] = {"date": NO_USAGE_DATE, "count": 0, "limit": entry["limit"]}
+            else:
+                del data[username]
+            reset += 1
+        if reset:
+            save_limits(data)
+    return reset
+
+def set_user_limits(usernames, limit: int | None) -> int:
+    """
+    Sets (or with None, clears) the daily quota for many users in one write.
+    Returns how many users actually changed.
+    """
+    with limits_lock():
+        data = load_limits()
+        updated = 0
+        for username in usernames:
+            entry = data.get(username)
+            if limit is None:
+                if entry is None or "limit" not in entry:
+                    continue
+                entry.pop("limit")
+                if entry["count"] == 0:
+                    del data[username]
+            else:
+                if entry is not None and entry.get("limit") == limit:
+                    continue
+                data.setdefault(username, {"date": NO_USAGE_DATE, "count": 0})["limit"] = limit
+            updated += 1
+        if updated:
+            save_limits(data)
+    return updated